@@ -60,10 +60,12 @@ def agent_executor(query, chat_history, scope, observations):
     """
     tools_description = "\n".join([f"- `{name}`: {func.__doc__.strip()}" for name, func in TOOLS.items()])
     available_files = list(st.session_state.dataframes.keys())
+    # Enquanto o refinamento do onboarding não termina, o agente trabalha sobre a amostra e precisa saber disso.
+    is_sample = (st.session_state.onboarding_data or {}).get("is_sample", False)
 
     # DevÆGENT-R (Correção): A variável `query` agora é passada diretamente para a função de criação do prompt.
     # A linha problemática `.format(query=query)` foi removida.
-    prompt = get_agent_prompt(scope, chat_history, tools_description, available_files, observations, query)
+    prompt = get_agent_prompt(scope, chat_history, tools_description, available_files, observations, query, is_sample)
     
     response = model.generate_content(prompt)
     thought_process = response.text
@@ -1,7 +1,9 @@
+import time
 import streamlit as st
-from agent_logic import agent_executor, process_tool_call, suggest_strategic_questions
-from tools import process_uploaded_file, catalog_files_metadata, generate_global_analysis_summary
-from ui_components import display_onboarding_results, render_chat_message
+from agent_logic import agent_executor, process_tool_call
+from tools import process_uploaded_file
+from onboarding import SAMPLE_ROWS, SAMPLE_TASKS, REFINEMENT_TASKS, run_analysis_tasks, is_complete_sample, FullDataRefinement
+from ui_components import STAGE_LABELS, format_stage_timings, display_sample_preview, display_onboarding_task_result, display_onboarding_results, render_chat_message
 from cache_manager import SemanticCacheManager # DevÆGENT: Importa o novo gerenciador de cache
 
 # Inicializa o gerenciador de cache.
@@ -41,9 +43,23 @@ def initialize_session_state():
     if "active_scope" not in st.session_state: st.session_state.active_scope = "Nenhum"
     if "run_prompt_from_suggestion" not in st.session_state: st.session_state.run_prompt_from_suggestion = None
     if "onboarding_data" not in st.session_state: st.session_state.onboarding_data = None
+    if "refinement_job" not in st.session_state: st.session_state.refinement_job = None
+    if "uploader_key" not in st.session_state: st.session_state.uploader_key = 0
 
 initialize_session_state()
 
+def reset_uploaded_data():
+    """Callback para voltar à tela de upload, cancelando o refinamento em segundo plano desta sessão."""
+    if st.session_state.refinement_job is not None:
+        st.session_state.refinement_job.cancel()
+    st.session_state.refinement_job = None
+    st.session_state.dataframes = None
+    st.session_state.onboarding_data = None
+    st.session_state.messages = []
+    st.session_state.active_scope = "Nenhum"
+    # Uma nova chave recria o uploader vazio; caso contrário, o arquivo anterior seria processado de novo.
+    st.session_state.uploader_key += 1
+
 # =============================================================================
 # 3. LÓGICA DO CHAT (AGORA COM CACHE SEMÂNTICO)
 # =============================================================================
@@ -52,6 +68,8 @@ def run_chat_logic(prompt: str):
     Encapsula a lógica de execução do agente, agora com um passo inicial de verificação de cache.
     """
     st.session_state.messages.append({"role": "user", "content": prompt})
+    # Respostas calculadas sobre a amostra do onboarding não vão para o cache, que é persistente e compartilhado.
+    answered_on_sample = st.session_state.onboarding_data["is_sample"]
     
     # DevÆGENT-E (Economy): Antes de gastar tokens com o agente, verificamos o cache.
     cached_response = cache_manager.search_cache(prompt)
@@ -99,13 +117,50 @@ def run_chat_logic(prompt: str):
             st.session_state.messages.append({"role": "assistant", "content": final_response})
 
     # DevÆGENT-I (Intelligence): Salva a nova resposta no cache para uso futuro.
-    if final_response:
+    if final_response and not answered_on_sample:
         cache_manager.add_to_cache(question=prompt, answer=final_response)
     
     st.rerun()
 
 # =============================================================================
-# 4. RENDERIZAÇÃO DA INTERFACE
+# 4. REFINAMENTO DO ONBOARDING EM SEGUNDO PLANO
+# =============================================================================
+@st.fragment(run_every="2s")
+def poll_full_data_refinement():
+    """
+    Acompanha o refinamento com os dados completos sem bloquear o chat.
+    Quando o refinamento termina, substitui a amostra no estado da sessão e recarrega o app.
+    """
+    job = st.session_state.refinement_job
+    if not job.done():
+        # `job.timings` é preenchido pela thread de refinamento; a cópia evita ler o dicionário enquanto ele muda.
+        finished = dict(job.timings)
+        total_stages = 1 + len(REFINEMENT_TASKS)
+        progress_text = f"⏳ Refinando a análise com os dados completos ({len(finished)}/{total_stages} estágios, {job.elapsed():.0f}s)"
+        st.progress(len(finished) / total_stages, text=progress_text)
+        if finished:
+            st.caption(format_stage_timings(finished))
+        return
+
+    st.session_state.refinement_job = None
+    try:
+        dataframes, onboarding_data = job.result()
+    except Exception as e:
+        message = f"Não foi possível carregar os dados completos ({e}). As análises continuam usando a amostra."
+    else:
+        st.session_state.dataframes = dataframes
+        st.session_state.onboarding_data = onboarding_data
+        total_rows = sum(details["linhas"] for details in onboarding_data["metadata"].values())
+        refinement_timings = {name: onboarding_data["timings"][name] for name in ["full_parse", *REFINEMENT_TASKS]}
+        message = (
+            f"📊 Dados completos carregados ({total_rows:,} linhas) em {job.elapsed():.2f}s. "
+            f"As próximas respostas usam o conjunto completo.\n\n{format_stage_timings(refinement_timings)}"
+        )
+    st.session_state.messages.append({"role": "assistant", "content": message})
+    st.rerun()
+
+# =============================================================================
+# 5. RENDERIZAÇÃO DA INTERFACE
 # =============================================================================
 # O restante do arquivo app.py (renderização da UI) não precisa de alterações.
 # ... (código da UI igual ao da iteração anterior) ...
@@ -115,35 +170,56 @@ if st.session_state.dataframes is None:
     st.title("🍏 Data Insights Pro")
     st.markdown("##### Transforme dados brutos em insights claros. Comece fazendo o upload.")
     st.markdown("---")
-    uploaded_file = st.file_uploader("Carregue um arquivo `.zip` ou `.csv`", type=["zip", "csv"], label_visibility="collapsed")
+    uploaded_file = st.file_uploader("Carregue um arquivo `.zip` ou `.csv`", type=["zip", "csv"], label_visibility="collapsed", key=f"uploader_{st.session_state.uploader_key}")
     
     if uploaded_file:
-        with st.spinner("Processando e analisando seus dados..."):
-            dfs = process_uploaded_file(uploaded_file)
+        # DevÆGENT-S (Scalability): Apenas uma amostra é processada aqui; o chat é liberado assim que ela fica pronta
+        # e os dados completos são refinados em segundo plano (ver onboarding.py).
+        with st.status("Processando e analisando uma amostra dos seus dados...", expanded=True) as status:
+            start = time.perf_counter()
+            dfs = process_uploaded_file(uploaded_file, nrows=SAMPLE_ROWS)
+            sample_parse_time = time.perf_counter() - start
+            st.write(f"✅ {STAGE_LABELS['sample_parse']} (até {SAMPLE_ROWS:,} linhas por arquivo): {sample_parse_time:.2f}s")
             if dfs:
+                # A prévia aparece antes das análises, que podem esperar pela resposta do LLM.
+                display_sample_preview(dfs)
+                onboarding_data, timings = run_analysis_tasks(dfs, SAMPLE_TASKS, on_task_done=display_onboarding_task_result)
+                sample_is_complete = is_complete_sample(uploaded_file.name, uploaded_file.getvalue())
+                onboarding_data["timings"] = {"sample_parse": sample_parse_time, **timings}
+                onboarding_data["is_sample"] = not sample_is_complete
+                status.update(label=f"Análise inicial concluída em {time.perf_counter() - start:.2f}s", state="complete", expanded=False)
+
                 st.session_state.dataframes = dfs
-                st.session_state.onboarding_data = {
-                    "metadata": catalog_files_metadata(dfs),
-                    "summary_df": generate_global_analysis_summary(dfs),
-                    "strategic_questions": suggest_strategic_questions(dfs)
-                }
+                st.session_state.onboarding_data = onboarding_data
+                if not sample_is_complete:
+                    st.session_state.refinement_job = FullDataRefinement(uploaded_file.name, uploaded_file.getvalue(), onboarding_data)
                 st.session_state.active_scope = "Analisar Todos em Conjunto"
                 st.rerun()
+            else:
+                status.update(label="Não foi possível ler os dados enviados.", state="error")
 # --- TELA DE CHAT E ANÁLISE (ESTADO PRINCIPAL) ---
 else:
     if not st.session_state.messages:
-        display_onboarding_results(**st.session_state.onboarding_data)
         st.session_state.messages.append({"role": "assistant", "content": "Estou pronto para ajudar. Faça uma pergunta ou escolha uma das sugestões."})
+    # Mantém o onboarding visível até a primeira pergunta, para que os resultados refinados substituam os da amostra na tela.
+    if not any(msg["role"] == "user" for msg in st.session_state.messages):
+        display_onboarding_results(**st.session_state.onboarding_data)
+    if st.session_state.refinement_job is not None:
+        poll_full_data_refinement()
 
     st.title("🍏 Conversando com seus Dados")
     
     options = ["Analisar Todos em Conjunto"] + list(st.session_state.dataframes.keys())
     st.selectbox("Escopo da Análise:", options, key="active_scope", label_visibility="collapsed")
+    st.button("🔄 Carregar outros dados", on_click=reset_uploaded_data)
     st.markdown("---")
 
     for msg in st.session_state.messages:
         render_chat_message(msg)
 
+    if st.session_state.onboarding_data["is_sample"]:
+        st.caption(f"⚠️ As respostas usam uma amostra (até {SAMPLE_ROWS:,} linhas por arquivo) até que os dados completos sejam carregados.")
+
     if prompt_from_suggestion := st.session_state.run_prompt_from_suggestion:
         st.session_state.run_prompt_from_suggestion = None
         run_chat_logic(prompt_from_suggestion)
@@ -0,0 +1,120 @@
+import io
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError, as_completed
+from agent_logic import suggest_strategic_questions
+from tools import parse_file_buffer, has_rows_beyond, catalog_files_metadata, generate_global_analysis_summary
+
+# DevÆGENT-S (Scalability): O onboarding é um pequeno grafo de tarefas em dois estágios.
+# 1. Amostra: as primeiras SAMPLE_ROWS linhas de cada arquivo alimentam metadados, estatísticas e
+#    perguntas em paralelo, liberando o chat o quanto antes.
+# 2. Refinamento: o arquivo completo é lido em segundo plano e seus resultados substituem os da amostra.
+
+SAMPLE_ROWS = 1000
+
+SAMPLE_TASKS = {
+    "metadata": catalog_files_metadata,
+    "summary_df": generate_global_analysis_summary,
+    "strategic_questions": suggest_strategic_questions,
+}
+
+# As perguntas estratégicas usam apenas as 3 primeiras linhas de cada arquivo, idênticas na amostra,
+# então o refinamento não repete a chamada ao LLM.
+REFINEMENT_TASKS = {
+    "metadata": catalog_files_metadata,
+    "summary_df": generate_global_analysis_summary,
+}
+
+def _timed(func, *args):
+    """Executa `func` e retorna o resultado junto com o tempo gasto, em segundos."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run_analysis_tasks(dataframes, tasks, on_task_done=None):
+    """
+    Executa as tarefas de análise em paralelo sobre os mesmos DataFrames.
+    Retorna (resultados, tempos) indexados pelo nome da tarefa. `on_task_done(nome, resultado, segundos)` é chamado
+    na thread de quem invocou, à medida que cada tarefa termina, para permitir exibir cada resultado assim que fica pronto.
+    """
+    results, timings = {}, {}
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="onboarding") as executor:
+        futures = {executor.submit(_timed, func, dataframes): name for name, func in tasks.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            results[name], timings[name] = future.result()
+            if on_task_done:
+                on_task_done(name, results[name], timings[name])
+    return results, timings
+
+def is_complete_sample(filename, data, sample_rows=SAMPLE_ROWS):
+    """
+    Indica se a leitura da amostra chegou ao fim de todos os arquivos enviados.
+    A decisão usa o conteúdo bruto, não o número de linhas da amostra, que pode ficar abaixo do limite
+    por causa de linhas malformadas descartadas mesmo quando o arquivo continua.
+    """
+    return not has_rows_beyond(filename, io.BytesIO(data), sample_rows)
+
+def _refine_with_full_data(filename, data, sample_onboarding_data, on_stage_done=None):
+    """
+    Lê o arquivo completo e recalcula as análises que dependem do volume total de dados.
+    `on_stage_done(nome, segundos)` é chamado ao fim de cada estágio (leitura e cada análise).
+    """
+    # Erros de leitura chegam ao `Future` com a mensagem original, para que o app possa exibi-la.
+    dataframes, parse_time = _timed(parse_file_buffer, filename, io.BytesIO(data))
+    if on_stage_done:
+        on_stage_done("full_parse", parse_time)
+    on_task_done = (lambda name, result, seconds: on_stage_done(name, seconds)) if on_stage_done else None
+    results, timings = run_analysis_tasks(dataframes, REFINEMENT_TASKS, on_task_done=on_task_done)
+    onboarding_data = {**sample_onboarding_data, **results, "is_sample": False}
+    onboarding_data["timings"] = {**sample_onboarding_data.get("timings", {}), "full_parse": parse_time, **timings}
+    return dataframes, onboarding_data
+
+class FullDataRefinement:
+    """
+    Refinamento com os dados completos de uma única sessão, executado em segundo plano.
+    Cada instância tem sua própria thread, então o upload de um usuário não atrasa o refinamento de outros.
+    O resultado é a tupla (dataframes, onboarding_data); a thread não toca no `st.session_state`,
+    cabendo ao app substituir os resultados da amostra quando o refinamento estiver concluído.
+    """
+    def __init__(self, filename, data, sample_onboarding_data):
+        self._cancelled = threading.Event()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        # Tempos dos estágios já concluídos, preenchidos pela thread de refinamento para exibição do progresso.
+        self.timings = {}
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="onboarding-refinement")
+        self.future = executor.submit(self._run, filename, data, sample_onboarding_data)
+        # Não aceita novas tarefas; a thread termina sozinha assim que o refinamento acabar.
+        executor.shutdown(wait=False)
+
+    def _run(self, filename, data, sample_onboarding_data):
+        # `finished_at` é definido na própria thread, antes de o `Future` ser concluído, para que `elapsed()` já seja final.
+        try:
+            return _refine_with_full_data(filename, data, sample_onboarding_data, self._on_stage_done)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def _on_stage_done(self, name, seconds):
+        """Registra o tempo do estágio e serve de ponto de cancelamento cooperativo entre os estágios."""
+        self.timings[name] = seconds
+        if self._cancelled.is_set():
+            raise CancelledError()
+
+    def elapsed(self):
+        """Tempo decorrido desde o início do refinamento (ou sua duração total, se já terminou), em segundos."""
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def cancel(self):
+        """
+        Cancela o refinamento (por exemplo, ao carregar outros dados). O cancelamento é verificado ao fim de cada
+        estágio: uma leitura completa em andamento não é interrompida, mas as análises seguintes não são executadas.
+        """
+        self._cancelled.set()
+        self.future.cancel()
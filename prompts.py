@@ -1,9 +1,15 @@
-def get_agent_prompt(scope, chat_history, tools_description, available_files, observations, query):
-    """Gera o prompt principal para o agente ReAct multi-passo."""
+def get_agent_prompt(scope, chat_history, tools_description, available_files, observations, query, is_sample=False):
+    """Gera o prompt principal para o agente ReAct multi-passo. `is_sample` avisa o agente que os dados ainda são uma amostra."""
     history_str = "\n".join([f'{msg["role"]}: {str(msg["content"])}' for msg in chat_history if isinstance(msg["content"], str)])
     
     observations_str = "\n".join(observations) if observations else "Nenhuma observação ainda. Este é o primeiro passo."
 
+    data_status = (
+        "APENAS UMA AMOSTRA (as primeiras linhas de cada arquivo); os dados completos ainda estão sendo carregados. "
+        "Ao responder sobre totais, contagens, médias ou extremos, deixe claro que o resultado se refere somente à amostra."
+        if is_sample else "Completos."
+    )
+
     return f"""
     Você é um agente de análise de dados. Sua tarefa é responder à pergunta do usuário através de um ciclo de Pensamento, Ação e Observação.
 
@@ -15,6 +21,7 @@ def get_agent_prompt(scope, chat_history, tools_description, available_files, ob
     **CONTEXTO ATUAL:**
     - Escopo da Análise: {scope}
     - Arquivos Disponíveis: {available_files}
+    - Dados Carregados: {data_status}
     - Histórico da Conversa: {history_str}
 
     **FERRAMENTAS DISPONÍVEIS:**
@@ -0,0 +1,14 @@
+import io
+import zipfile
+import pytest
+
+@pytest.fixture
+def zip_bytes():
+    """Retorna uma função que cria um .zip em memória com os arquivos informados ({nome: conteúdo})."""
+    def _zip_bytes(files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as z:
+            for name, content in files.items():
+                z.writestr(name, content)
+        return buffer.getvalue()
+    return _zip_bytes
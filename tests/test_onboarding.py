@@ -0,0 +1,103 @@
+import io
+import threading
+from concurrent.futures import CancelledError
+import pytest
+import pandas as pd
+import onboarding
+from onboarding import run_analysis_tasks, is_complete_sample, _refine_with_full_data, FullDataRefinement
+from tools import parse_file_buffer
+
+@pytest.fixture
+def sample_dfs():
+    return {"a.csv": pd.DataFrame({'A': [1, 2, 3]}), "b.csv": pd.DataFrame({'B': ['x', 'y']})}
+
+def test_run_analysis_tasks_collects_results_and_timings(sample_dfs):
+    """Testa se todas as tarefas rodam sobre os mesmos dados e reportam seu tempo."""
+    finished = []
+    tasks = {"linhas": lambda dfs: sum(len(df) for df in dfs.values()), "arquivos": lambda dfs: len(dfs)}
+    results, timings = run_analysis_tasks(sample_dfs, tasks, on_task_done=lambda name, result, seconds: finished.append((name, result)))
+    assert results == {"linhas": 5, "arquivos": 2}
+    assert set(timings) == {"linhas", "arquivos"}
+    assert all(seconds >= 0 for seconds in timings.values())
+    assert sorted(finished) == [("arquivos", 2), ("linhas", 5)]
+
+def test_is_complete_sample(zip_bytes):
+    """Uma amostra só é completa se a leitura chegou ao fim de todos os arquivos."""
+    csv_content = "A,B\n" + "\n".join(f"{i},{i * 2}" for i in range(3))
+    assert is_complete_sample("dados.csv", csv_content.encode(), sample_rows=5)
+    assert not is_complete_sample("dados.csv", csv_content.encode(), sample_rows=2)
+    assert not is_complete_sample("dados.zip", zip_bytes({"a.csv": "A\n1", "b.csv": csv_content}), sample_rows=2)
+
+def test_is_complete_sample_with_bad_line_inside_sample():
+    """Uma linha malformada descartada deixa a amostra abaixo do limite, mas o arquivo continua e precisa de refinamento."""
+    rows = [f"{i},{i * 2}" for i in range(9)]
+    rows[2] = "2,4,extra,colunas"
+    csv_content = "A,B\n" + "\n".join(rows)
+    sample = parse_file_buffer("dados.csv", io.BytesIO(csv_content.encode()), nrows=5)
+    assert len(sample["dados.csv"]) < 5
+    assert not is_complete_sample("dados.csv", csv_content.encode(), sample_rows=5)
+
+def test_full_data_refinement_replaces_sample_results(zip_bytes):
+    """Testa se o refinamento recalcula metadados com os dados completos e preserva as perguntas da amostra."""
+    csv_content = "A,B\n" + "\n".join(f"{i},{i * 2}" for i in range(10))
+    sample_onboarding_data = {
+        "metadata": {"dados.csv": {"linhas": 4}},
+        "summary_df": pd.DataFrame(),
+        "strategic_questions": "1. Pergunta?",
+        "timings": {"sample_parse": 0.1},
+        "is_sample": True,
+    }
+    finished = []
+    dataframes, onboarding_data = _refine_with_full_data(
+        "dados.zip", zip_bytes({"dados.csv": csv_content}), sample_onboarding_data,
+        on_stage_done=lambda name, seconds: finished.append(name)
+    )
+    assert len(dataframes["dados.csv"]) == 10
+    assert onboarding_data["metadata"]["dados.csv"]["linhas"] == 10
+    assert onboarding_data["strategic_questions"] == "1. Pergunta?"
+    assert onboarding_data["is_sample"] is False
+    assert {"sample_parse", "full_parse", "metadata", "summary_df"} <= set(onboarding_data["timings"])
+    assert finished[0] == "full_parse" and sorted(finished[1:]) == ["metadata", "summary_df"]
+
+def _blocking(func, started, release):
+    """Envolve `func` para sinalizar quando começou e aguardar a liberação do teste antes de executar."""
+    def wrapper(*args):
+        started.set()
+        assert release.wait(timeout=10)
+        return func(*args)
+    return wrapper
+
+def test_full_data_refinement_propagates_parse_errors(zip_bytes):
+    """Um upload inválido faz `result()` levantar o erro original da leitura."""
+    job = FullDataRefinement("dados.zip", zip_bytes({"leia-me.txt": "sem dados"}), {})
+    with pytest.raises(ValueError, match="não contém nenhum arquivo .csv"):
+        job.result(timeout=10)
+    assert job.done()
+
+def test_full_data_refinement_cancel_stops_before_analysis(zip_bytes, monkeypatch):
+    """Cancelar durante a leitura completa impede as análises seguintes e conclui o job."""
+    started, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(onboarding, "parse_file_buffer", _blocking(onboarding.parse_file_buffer, started, release))
+    job = FullDataRefinement("dados.zip", zip_bytes({"dados.csv": "A\n1\n2"}), {})
+    assert started.wait(timeout=10)
+    job.cancel()
+    assert not job.done()
+    release.set()
+    with pytest.raises(CancelledError):
+        job.result(timeout=10)
+    assert job.done()
+    assert set(job.timings) == {"full_parse"}
+
+def test_full_data_refinement_fills_timings_stage_by_stage(zip_bytes, monkeypatch):
+    """Os tempos de cada estágio aparecem em `timings` à medida que os estágios terminam."""
+    started, release = threading.Event(), threading.Event()
+    monkeypatch.setitem(onboarding.REFINEMENT_TASKS, "metadata", _blocking(onboarding.catalog_files_metadata, started, release))
+    job = FullDataRefinement("dados.zip", zip_bytes({"dados.csv": "A\n1\n2"}), {"timings": {"sample_parse": 0.1}})
+    assert started.wait(timeout=10)
+    assert "full_parse" in job.timings
+    assert "metadata" not in job.timings
+    release.set()
+    dataframes, onboarding_data = job.result(timeout=10)
+    assert set(job.timings) == {"full_parse", "metadata", "summary_df"}
+    assert onboarding_data["timings"]["metadata"] == job.timings["metadata"]
+    assert job.elapsed() == job.elapsed() >= job.timings["full_parse"]
@@ -1,7 +1,8 @@
+import io
 import pytest
 import pandas as pd
 from unittest.mock import patch, MagicMock
-from tools import python_code_interpreter, get_data_schema
+from tools import python_code_interpreter, get_data_schema, parse_file_buffer, dataframes_signature
 
 # Criando um DataFrame de teste que pode ser usado em múltiplos testes
 @pytest.fixture
@@ -40,3 +41,23 @@ def test_get_data_schema_file_not_found(mock_session_state):
     mock_session_state.dataframes = {} # Simula estado sem o arquivo
     result = get_data_schema("non_existent_file.csv")
     assert "Erro: Arquivo 'non_existent_file.csv' não encontrado" in result
+
+def test_parse_file_buffer_limits_rows(zip_bytes):
+    """Testa a leitura parcial (amostra) de CSVs soltos e dentro de um .zip."""
+    csv_content = "A,B\n" + "\n".join(f"{i},{i * 2}" for i in range(10))
+    sample = parse_file_buffer("dados.csv", io.BytesIO(csv_content.encode()), nrows=4)
+    assert len(sample["dados.csv"]) == 4
+    zipped = parse_file_buffer("dados.zip", io.BytesIO(zip_bytes({"dados.csv": csv_content})), nrows=4)
+    assert len(zipped["dados.csv"]) == 4
+
+def test_parse_file_buffer_propagates_errors(zip_bytes):
+    """Testa se erros de leitura chegam a quem chamou, em vez de serem apenas exibidos pelo Streamlit."""
+    with pytest.raises(ValueError, match="não contém nenhum arquivo .csv"):
+        parse_file_buffer("dados.zip", io.BytesIO(zip_bytes({"leia-me.txt": "sem dados"})))
+
+def test_dataframes_signature_depends_on_content():
+    """Arquivos com mesmo nome, colunas e número de linhas, mas conteúdo diferente, não compartilham o cache."""
+    first = {"dados.csv": pd.DataFrame({'A': [1, 2, 3]})}
+    second = {"dados.csv": pd.DataFrame({'A': [4, 5, 6]})}
+    assert dataframes_signature(first) != dataframes_signature(second)
+    assert dataframes_signature(first) == dataframes_signature({"dados.csv": pd.DataFrame({'A': [1, 2, 3]})})
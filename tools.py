@@ -11,31 +11,67 @@ from duckduckgo_search import DDGS
 # =============================================================================
 
 @st.cache_data
-def process_uploaded_file(uploaded_file):
-    """Processa um arquivo .zip ou .csv e retorna um dicionário de DataFrames."""
-    if uploaded_file.name.lower().endswith(".zip"):
-        return unpack_zip_to_dataframes(uploaded_file)
-    elif uploaded_file.name.lower().endswith(".csv"):
+def process_uploaded_file(uploaded_file, nrows=None):
+    """
+    Processa um arquivo .zip ou .csv e retorna um dicionário de DataFrames.
+    Se `nrows` for informado, lê apenas as primeiras `nrows` linhas de cada CSV (amostra do onboarding).
+    """
+    try:
+        return parse_file_buffer(uploaded_file.name, io.BytesIO(uploaded_file.getvalue()), nrows)
+    except Exception as e:
+        st.error(f"Erro fatal ao processar o arquivo: {e}")
+        return None
+
+def parse_file_buffer(filename, buffer, nrows=None):
+    """
+    Converte o conteúdo de um .zip ou .csv em um dicionário de DataFrames.
+    Não usa o Streamlit: erros de leitura são propagados para quem chamou, o que permite rodar em uma thread de segundo plano.
+    """
+    if filename.lower().endswith(".zip"):
+        return unpack_zip_to_dataframes(buffer, nrows)
+    elif filename.lower().endswith(".csv"):
         # DevÆGENT-R: O separador automático (sep=None) é bom, mas on_bad_lines='skip' pode esconder problemas. 'warn' seria uma alternativa. mantendo 'skip' por simplicidade.
-        return {uploaded_file.name: pd.read_csv(uploaded_file, sep=None, engine='python', on_bad_lines='skip')}
+        return {filename: pd.read_csv(buffer, sep=None, engine='python', on_bad_lines='skip', nrows=nrows)}
     return None
 
-def unpack_zip_to_dataframes(zip_file):
-    """Extrai todos os CSVs de um arquivo zip, ignorando arquivos de metadados do macOS."""
-    dataframes = {}
-    try:
-        with zipfile.ZipFile(zip_file, 'r') as z:
+def has_rows_beyond(filename, buffer, nrows):
+    """
+    Indica se algum CSV do .zip ou .csv tem linhas além das `nrows` primeiras linhas de dados.
+    Conta linhas físicas em vez de confiar no tamanho da amostra: com `on_bad_lines='skip'`, linhas malformadas
+    contam para `nrows` mas não viram linhas do DataFrame. A contagem é conservadora (quebras de linha dentro de
+    aspas ou linhas em branco só podem indicar linhas a mais) e para de ler assim que o limite é ultrapassado.
+    """
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(buffer, 'r') as z:
             csv_files = [name for name in z.namelist() if name.lower().endswith('.csv') and not name.startswith('__MACOSX')]
-            if not csv_files:
-                st.warning("O arquivo .zip não contém nenhum arquivo .csv.")
-                return None
             for name in csv_files:
                 with z.open(name) as f:
-                    dataframes[name] = pd.read_csv(f, sep=None, engine='python', on_bad_lines='skip')
-        return dataframes if dataframes else None
-    except Exception as e:
-        st.error(f"Erro fatal ao processar o arquivo zip: {e}")
-        return None
+                    if _has_more_line_breaks_than(f, nrows):
+                        return True
+        return False
+    return _has_more_line_breaks_than(buffer, nrows)
+
+def _has_more_line_breaks_than(file_obj, limit):
+    """Conta quebras de linha (`\\n` ou `\\r`) em blocos, parando assim que a contagem passa de `limit`."""
+    newlines = carriage_returns = 0
+    for chunk in iter(lambda: file_obj.read(1 << 16), b""):
+        newlines += chunk.count(b"\n")
+        carriage_returns += chunk.count(b"\r")
+        if max(newlines, carriage_returns) > limit:
+            return True
+    return False
+
+def unpack_zip_to_dataframes(zip_file, nrows=None):
+    """Extrai todos os CSVs de um arquivo zip, ignorando arquivos de metadados do macOS."""
+    dataframes = {}
+    with zipfile.ZipFile(zip_file, 'r') as z:
+        csv_files = [name for name in z.namelist() if name.lower().endswith('.csv') and not name.startswith('__MACOSX')]
+        if not csv_files:
+            raise ValueError("O arquivo .zip não contém nenhum arquivo .csv.")
+        for name in csv_files:
+            with z.open(name) as f:
+                dataframes[name] = pd.read_csv(f, sep=None, engine='python', on_bad_lines='skip', nrows=nrows)
+    return dataframes
 
 def catalog_files_metadata(dataframes):
     """Cria um dicionário com os metadados de cada DataFrame."""
@@ -51,13 +87,26 @@ def generate_global_analysis_summary(dataframes):
     combined_df = pd.concat(dataframes.values(), ignore_index=True)
     return combined_df.describe(include='all').fillna("N/A")
 
+def dataframes_signature(dataframes):
+    """
+    Resume os DataFrames carregados em uma tupla hasheável: nome, colunas e um hash do conteúdo de cada arquivo.
+    O hash do conteúdo evita que sessões com arquivos de mesmo nome e formato (por exemplo, amostras do
+    onboarding, que têm sempre o mesmo número de linhas) compartilhem a mesma entrada do cache.
+    """
+    return tuple(
+        (name, tuple(df.columns), int(pd.util.hash_pandas_object(df).sum()))
+        for name, df in dataframes.items()
+    )
+
 @st.cache_data
-def get_active_df(scope: str, _dataframes_keys):
+def get_active_df(scope: str, data_signature):
     """
     Retorna o DataFrame ativo com base no escopo selecionado.
     DevÆGENT-S (Scalability): O uso de `st.cache_data` aqui é crucial. Ele memoriza o resultado da concatenação
     de múltiplos arquivos, evitando que essa operação cara seja refeita a cada interação no chat.
-    `_dataframes_keys` é um truque para invalidar o cache se os arquivos de dados mudarem.
+    `data_signature` (ver `dataframes_signature`) entra na chave do cache, que é compartilhado entre as sessões:
+    como ela depende do conteúdo dos dados, a troca da amostra pelos dados completos gera uma nova entrada,
+    e sessões com dados diferentes nunca recebem o DataFrame umas das outras.
     """
     if scope == "Analisar Todos em Conjunto":
         # Esta operação é cara e agora está em cache.
@@ -78,7 +127,7 @@ def python_code_interpreter(code: str, scope: str):
     # DevÆGENT-R (Robustness): AVISO DE SEGURANÇA! `exec` é perigoso. Esta implementação tenta limitar o escopo,
     # mas não é um sandbox completo. Em um ambiente de produção real, o código deveria rodar em um container isolado.
     try:
-        active_df = get_active_df(scope, tuple(st.session_state.dataframes.keys()))
+        active_df = get_active_df(scope, dataframes_signature(st.session_state.dataframes))
         if active_df is None: return "Erro: Nenhum dado disponível no escopo selecionado."
         
         # Limita as funções built-in disponíveis para o código executado, aumentando a segurança.
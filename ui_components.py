@@ -1,13 +1,44 @@
 import streamlit as st
 import re
 
+# Rótulos exibidos para cada estágio do onboarding (ver onboarding.py).
+STAGE_LABELS = {
+    "sample_parse": "Leitura da amostra",
+    "full_parse": "Leitura dos dados completos",
+    "metadata": "Catálogo de metadados",
+    "summary_df": "Resumo estatístico",
+    "strategic_questions": "Perguntas estratégicas",
+}
+
+def format_stage_timings(timings):
+    """Formata os tempos dos estágios do onboarding em uma única linha."""
+    return " · ".join(f"{STAGE_LABELS.get(name, name)}: {seconds:.2f}s" for name, seconds in timings.items())
+
 def handle_suggestion_click(question_text):
     """Callback para definir a pergunta no estado da sessão."""
     st.session_state.run_prompt_from_suggestion = question_text
 
-def display_onboarding_results(metadata, summary_df, strategic_questions):
-    """Renderiza os resultados do onboarding."""
+def display_sample_preview(dataframes):
+    """Exibe as primeiras linhas de cada arquivo assim que a amostra é lida, antes das análises."""
+    for filename, df in dataframes.items():
+        st.markdown(f"**📄 {filename}**")
+        st.dataframe(df.head())
+
+def display_onboarding_task_result(name, result, seconds):
+    """Exibe o resultado de uma tarefa do onboarding assim que ela termina, sem esperar pelas demais."""
+    st.write(f"✅ {STAGE_LABELS[name]}: {seconds:.2f}s")
+    if name == "metadata":
+        st.json(result, expanded=False)
+    elif name == "summary_df":
+        st.dataframe(result)
+
+def display_onboarding_results(metadata, summary_df, strategic_questions, timings=None, is_sample=False):
+    """Renderiza os resultados do onboarding, indicando se ainda se baseiam na amostra e o tempo de cada estágio."""
     st.success("Análise inicial concluída! Explore os resultados abaixo e faça sua primeira pergunta.")
+    if is_sample:
+        st.caption("⏳ Resultados baseados em uma amostra dos dados. A versão completa substituirá esta assim que estiver pronta.")
+    if timings:
+        st.caption(format_stage_timings(timings))
     tab1, tab2, tab3 = st.tabs(["📊 Visão Geral", "🔢 Resumo Estatístico", "🧠 Perguntas Sugeridas"])
     with tab1:
         st.subheader("Resumo do Catálogo de Dados")